@@ -228,6 +228,7 @@ class Hook:
                 print(message)
                 traceback.print_exc()
 
+        metrics = MetricsPublisherProxy()
         event: Optional[HookInvocationRequest] = None
         try:
             sessions, invocation_point, callback, event = self._parse_request(
@@ -237,7 +238,6 @@ class Hook:
 
             request, type_configuration = self._cast_hook_request(event)
 
-            metrics = MetricsPublisherProxy()
             if event.requestData.providerLogGroupName and provider_sess:
                 HookProviderLogHandler.setup(event, provider_sess)
                 logs_setup = True
@@ -245,7 +245,7 @@ class Hook:
                     provider_sess, event.hookTypeName, event.awsAccountId
                 )
 
-            metrics.publish_invocation_metric(datetime.utcnow(), invocation_point)
+            metrics.publish_hook_invocation_metric(datetime.utcnow(), invocation_point)
             start_time = datetime.utcnow()
             error = None
 
@@ -257,9 +257,11 @@ class Hook:
                 error = e
 
             m_secs = (datetime.utcnow() - start_time).total_seconds() * 1000.0
-            metrics.publish_duration_metric(datetime.utcnow(), invocation_point, m_secs)
+            metrics.publish_hook_duration_metric(
+                datetime.utcnow(), invocation_point, m_secs
+            )
             if error:
-                metrics.publish_exception_metric(
+                metrics.publish_hook_exception_metric(
                     datetime.utcnow(), invocation_point, error
                 )
                 raise error
@@ -272,6 +274,8 @@ class Hook:
         except BaseException as e:  # pylint: disable=broad-except
             print_or_log("Base exception caught (this is usually bad) {0}".format(e))
             progress = ProgressEvent.failed(HandlerErrorCode.InternalFailure)
+        finally:
+            metrics.flush()
 
         # use the raw event_data as a last-ditch attempt to call back if the
         # request is invalid
@@ -1,8 +1,14 @@
 import datetime
+import functools
+import json
 import logging
-from typing import Any, List, Mapping, Optional, Union
+import os
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Optional, Tuple
 
-from botocore.exceptions import ClientError  # type: ignore
+from botocore.config import Config  # type: ignore
 
 from .boto3_proxy import SessionProxy
 from .interface import Action, HookInvocationPoint, MetricTypes, StandardUnit
@@ -11,11 +17,198 @@ LOG = logging.getLogger(__name__)
 
 METRIC_NAMESPACE_ROOT = "AWS/CloudFormation"
 
+# PutMetricData accepts at most this many datums per request
+MAX_METRIC_DATA_PER_REQUEST = 1000
+# a single MetricDatum may hold at most this many distinct values
+MAX_VALUES_PER_METRIC_DATUM = 150
+# an embedded metric format document may hold at most this many values per metric
+MAX_VALUES_PER_EMBEDDED_METRIC = 100
+
+# metrics are best effort, so a slow or throttled CloudWatch fails fast with a
+# single attempt instead of holding up the end of the handler with retries
+CLOUDWATCH_CLIENT_CONFIG = Config(
+    max_pool_connections=10,
+    retries={"total_max_attempts": 1, "mode": "standard"},
+    connect_timeout=0.5,
+    read_timeout=1.0,
+)
+
+
+MAX_CACHED_CLOUDWATCH_CLIENTS = 8
+
+# clients by region and credentials rather than by session, since every request
+# gets a new session even when its credentials are the same as the last one's
+_CLOUDWATCH_CLIENTS: Dict[Tuple[Optional[str], ...], Any] = {}
+
+
+def _cloudwatch_client(session: SessionProxy) -> Any:
+    # boto3 clients are expensive to build, so publishers share one client and
+    # its connection pool for as long as the process keeps the same credentials
+    credentials = session.session.get_credentials()
+    if credentials is None:
+        return session.client("cloudwatch", config=CLOUDWATCH_CLIENT_CONFIG)
+    credentials = credentials.get_frozen_credentials()
+    key = (session.session.region_name, credentials.access_key, credentials.token)
+    client = _CLOUDWATCH_CLIENTS.get(key)
+    if client is None:
+        client = session.client("cloudwatch", config=CLOUDWATCH_CLIENT_CONFIG)
+        if len(_CLOUDWATCH_CLIENTS) >= MAX_CACHED_CLOUDWATCH_CLIENTS:
+            del _CLOUDWATCH_CLIENTS[next(iter(_CLOUDWATCH_CLIENTS))]
+        _CLOUDWATCH_CLIENTS[key] = client
+    return client
+
+
+def _exception_type_name(error: Any) -> str:
+    error_type: type = type(error)
+    return _type_name(error_type)
+
+
+@functools.lru_cache(maxsize=64)
+def _type_name(error_type: type) -> str:
+    return sys.intern(f"{error_type.__module__}.{error_type.__qualname__}")
+
+
+@functools.lru_cache(maxsize=64)
+def _make_namespace(resource_type: str) -> str:
+    suffix = resource_type.replace("::", "/")
+    return f"{METRIC_NAMESPACE_ROOT}/{suffix}"
+
+
+@functools.lru_cache(maxsize=64)
+def _make_hook_namespace(hook_type: str, account_id: str) -> str:
+    suffix = hook_type.replace("::", "/")
+    return f"{METRIC_NAMESPACE_ROOT}/{account_id}/{suffix}"
+
 
 def format_dimensions(dimensions: Mapping[str, str]) -> List[Mapping[str, str]]:
     return [{"Name": key, "Value": value} for key, value in dimensions.items()]
 
 
+def _shared_dimensions(dimensions: Mapping[str, str]) -> List[Mapping[str, str]]:
+    # the result is cached and shared by every datum with these dimensions,
+    # so it is kept inside this module and never mutated
+    return _format_dimensions(tuple(dimensions.items()))
+
+
+@functools.lru_cache(maxsize=256)
+def _format_dimensions(
+    dimensions: Tuple[Tuple[str, str], ...]
+) -> List[Mapping[str, str]]:
+    return [{"Name": key, "Value": value} for key, value in dimensions]
+
+
+# enum names are read for every metric, so they are looked up once and interned
+_METRIC_NAMES = {metric: sys.intern(metric.name) for metric in MetricTypes}
+_UNIT_NAMES = {unit: sys.intern(unit.name) for unit in StandardUnit}
+_ACTION_NAMES = {action: sys.intern(action.name) for action in Action}
+_INVOCATION_POINT_NAMES = {
+    point: sys.intern(point.name) for point in HookInvocationPoint
+}
+
+
+# set to "true" to write metrics to stdout in the embedded metric format instead
+# of calling PutMetricData. off by default, since those metrics end up in the
+# account that runs the handler rather than the type owner's account
+EMBEDDED_METRIC_FORMAT_ENV = "CFN_PYTHON_LIB_EMBEDDED_METRICS"
+
+
+def _use_embedded_metric_format() -> bool:
+    return os.environ.get(EMBEDDED_METRIC_FORMAT_ENV, "").lower() == "true"
+
+
+def _coalesce_metric_data(
+    metric_data: List[MutableMapping[str, Any]]
+) -> List[MutableMapping[str, Any]]:
+    # datums that only differ by value within the same minute are merged into
+    # one datum with Values and Counts, which CloudWatch treats the same as
+    # the individual data points
+    groups: Dict[Tuple[Any, ...], List[MutableMapping[str, Any]]] = {}
+    coalesced: List[MutableMapping[str, Any]] = []
+    for datum in metric_data:
+        if "Value" not in datum:
+            coalesced.append(datum)
+            continue
+        key = (
+            datum["MetricName"],
+            tuple((dim["Name"], dim["Value"]) for dim in datum["Dimensions"]),
+            datum["Unit"],
+            datum["Timestamp"].replace(second=0, microsecond=0),
+        )
+        groups.setdefault(key, []).append(datum)
+
+    for (metric_name, _dimensions, unit, minute), data in groups.items():
+        if len(data) == 1:
+            coalesced.extend(data)
+            continue
+        counts = Counter(datum["Value"] for datum in data)
+        values = list(counts)
+        while values:
+            chunk = values[:MAX_VALUES_PER_METRIC_DATUM]
+            values = values[MAX_VALUES_PER_METRIC_DATUM:]
+            coalesced.append(
+                {
+                    "MetricName": metric_name,
+                    "Dimensions": data[0]["Dimensions"],
+                    "Unit": unit,
+                    "Timestamp": minute,
+                    "Values": chunk,
+                    "Counts": [float(counts[value]) for value in chunk],
+                }
+            )
+    return coalesced
+
+
+@dataclass
+class _InvocationCount:
+    template: Dict[str, Any]
+    timestamp: datetime.datetime
+    count: int
+
+    def to_metric_datum(self) -> MutableMapping[str, Any]:
+        datum = self.template.copy()
+        datum["Timestamp"] = self.timestamp
+        if self.count == 1:
+            datum["Value"] = 1.0
+        else:
+            datum["Values"] = [1.0]
+            datum["Counts"] = [float(self.count)]
+        return datum
+
+
+@dataclass
+class _DurationAggregate:
+    template: Dict[str, Any]
+    timestamp: datetime.datetime
+    sample_count: int
+    total: float
+    minimum: float
+    maximum: float
+
+    def add(self, milliseconds: float, timestamp: datetime.datetime) -> None:
+        self.timestamp = timestamp
+        self.sample_count += 1
+        self.total += milliseconds
+        if milliseconds < self.minimum:
+            self.minimum = milliseconds
+        elif milliseconds > self.maximum:
+            self.maximum = milliseconds
+
+    def to_metric_datum(self) -> MutableMapping[str, Any]:
+        datum = self.template.copy()
+        datum["Timestamp"] = self.timestamp
+        # a single sample is sent as a plain value so percentiles stay available
+        if self.sample_count == 1:
+            datum["Value"] = self.total
+        else:
+            datum["StatisticValues"] = {
+                "SampleCount": float(self.sample_count),
+                "Sum": self.total,
+                "Minimum": self.minimum,
+                "Maximum": self.maximum,
+            }
+        return datum
+
+
 class MetricsPublisher:
     """A cloudwatch based metric publisher.\
     Given a resource type and session, \
@@ -33,12 +226,59 @@ class MetricsPublisher:
     publish_duration_metric: Publishes an duration metric
 
     publish_log_delivery_exception_metric: Publishes an log delivery exception metric
+
+    flush: Sends all buffered metrics to CloudWatch in batched calls
     """
 
+    __slots__ = (
+        "_client",
+        "_resource_type",
+        "_namespace",
+        "_buffer",
+        "_invocations",
+        "_durations",
+        "_datum_templates",
+    )
+
+    # the names of the operations metrics are reported for, and the dimension
+    # keys naming the operation and the type. subclasses override these for
+    # other types
+    _OPERATION_NAMES: Iterable[str] = _ACTION_NAMES.values()
+    _OPERATION_DIMENSION_KEY = "DimensionKeyActionType"
+    _TYPE_DIMENSION_KEY = "DimensionKeyResourceType"
+
     def __init__(self, session: SessionProxy, resource_type: str) -> None:
-        self._client = session.client("cloudwatch")
+        self._client = self._make_client(session)
         self._resource_type = resource_type
-        self._namespace = self._make_namespace(self._resource_type)
+        self._namespace = _make_namespace(self._resource_type)
+        self._buffer: List[MutableMapping[str, Any]] = []
+        # invocations are counted and durations aggregated per operation,
+        # then sent as a single datum each
+        self._invocations: Dict[str, _InvocationCount] = {}
+        self._durations: Dict[str, _DurationAggregate] = {}
+        # everything but the timestamp and value of the metrics that are not
+        # specific to an error, so only those need filling in per metric
+        self._datum_templates: Dict[Tuple[MetricTypes, str], Dict[str, Any]] = {}
+        for operation in self._OPERATION_NAMES:
+            dimensions = _shared_dimensions(
+                {
+                    self._OPERATION_DIMENSION_KEY: operation,
+                    self._TYPE_DIMENSION_KEY: resource_type,
+                }
+            )
+            for metric_name, unit in (
+                (MetricTypes.HandlerInvocationCount, StandardUnit.Count),
+                (MetricTypes.HandlerInvocationDuration, StandardUnit.Milliseconds),
+            ):
+                self._datum_templates[metric_name, operation] = {
+                    "MetricName": _METRIC_NAMES[metric_name],
+                    "Dimensions": dimensions,
+                    "Unit": _UNIT_NAMES[unit],
+                }
+
+    @staticmethod
+    def _make_client(session: SessionProxy) -> Any:
+        return _cloudwatch_client(session)
 
     def publish_metric(  # pylint: disable-msg=too-many-arguments
         self,
@@ -48,98 +288,141 @@ class MetricsPublisher:
         value: float,
         timestamp: datetime.datetime,
     ) -> None:
-        try:
-            self._client.put_metric_data(
-                Namespace=self._namespace,
-                MetricData=[
-                    {
-                        "MetricName": metric_name.name,
-                        "Dimensions": format_dimensions(dimensions),
-                        "Unit": unit.name,
-                        "Timestamp": str(timestamp),
-                        "Value": value,
-                    }
-                ],
+        self._buffer_metric(
+            metric_name, _shared_dimensions(dimensions), unit, value, timestamp
+        )
+
+    def _emit(  # pylint: disable-msg=too-many-arguments
+        self,
+        metric_name: MetricTypes,
+        operation: str,
+        unit: StandardUnit,
+        value: float,
+        timestamp: datetime.datetime,
+        error: Any = None,
+    ) -> None:
+        if error is None:
+            datum = self._datum_templates[metric_name, operation].copy()
+            datum["Timestamp"] = timestamp
+            datum["Value"] = value
+            self._buffer.append(datum)
+            return
+        dimensions = _shared_dimensions(
+            {
+                self._OPERATION_DIMENSION_KEY: operation,
+                "DimensionKeyExceptionType": _exception_type_name(error),
+                self._TYPE_DIMENSION_KEY: self._resource_type,
+            }
+        )
+        self._buffer_metric(metric_name, dimensions, unit, value, timestamp)
+
+    def _record_invocation(self, operation: str, timestamp: datetime.datetime) -> None:
+        invocations = self._invocations.get(operation)
+        if invocations is None:
+            self._invocations[operation] = _InvocationCount(
+                self._datum_templates[MetricTypes.HandlerInvocationCount, operation],
+                timestamp,
+                1,
             )
+        else:
+            invocations.count += 1
+            invocations.timestamp = timestamp
 
-        except ClientError as e:
-            LOG.error("An error occurred while publishing metrics: %s", str(e))
+    def _record_duration(
+        self, operation: str, milliseconds: float, timestamp: datetime.datetime
+    ) -> None:
+        aggregate = self._durations.get(operation)
+        if aggregate is None:
+            self._durations[operation] = _DurationAggregate(
+                self._datum_templates[MetricTypes.HandlerInvocationDuration, operation],
+                timestamp,
+                1,
+                milliseconds,
+                milliseconds,
+                milliseconds,
+            )
+        else:
+            aggregate.add(milliseconds, timestamp)
+
+    def _buffer_metric(  # pylint: disable-msg=too-many-arguments
+        self,
+        metric_name: MetricTypes,
+        dimensions: List[Mapping[str, str]],
+        unit: StandardUnit,
+        value: float,
+        timestamp: datetime.datetime,
+    ) -> None:
+        self._buffer.append(
+            {
+                "MetricName": _METRIC_NAMES[metric_name],
+                "Dimensions": dimensions,
+                "Unit": _UNIT_NAMES[unit],
+                "Timestamp": timestamp,
+                "Value": value,
+            }
+        )
+
+    def flush(self) -> None:
+        metric_data, self._buffer = self._buffer, []
+        invocations, self._invocations = self._invocations, {}
+        durations, self._durations = self._durations, {}
+        metric_data = [
+            *(invocation.to_metric_datum() for invocation in invocations.values()),
+            *_coalesce_metric_data(metric_data),
+            *(duration.to_metric_datum() for duration in durations.values()),
+        ]
+        while metric_data:
+            chunk = metric_data[:MAX_METRIC_DATA_PER_REQUEST]
+            metric_data = metric_data[MAX_METRIC_DATA_PER_REQUEST:]
+            self._client.put_metric_data(Namespace=self._namespace, MetricData=chunk)
 
     def publish_exception_metric(
         self, timestamp: datetime.datetime, action: Action, error: Any
     ) -> None:
-        dimensions: Mapping[str, str] = {
-            "DimensionKeyActionType": action.name,
-            "DimensionKeyExceptionType": str(type(error)),
-            "DimensionKeyResourceType": self._resource_type,
-        }
-        self.publish_metric(
-            metric_name=MetricTypes.HandlerException,
-            dimensions=dimensions,
-            unit=StandardUnit.Count,
-            value=1.0,
-            timestamp=timestamp,
+        self._emit(
+            MetricTypes.HandlerException,
+            _ACTION_NAMES[action],
+            StandardUnit.Count,
+            1.0,
+            timestamp,
+            error,
         )
 
     def publish_invocation_metric(
         self, timestamp: datetime.datetime, action: Action
     ) -> None:
-        dimensions = {
-            "DimensionKeyActionType": action.name,
-            "DimensionKeyResourceType": self._resource_type,
-        }
-        self.publish_metric(
-            metric_name=MetricTypes.HandlerInvocationCount,
-            dimensions=dimensions,
-            unit=StandardUnit.Count,
-            value=1.0,
-            timestamp=timestamp,
-        )
+        self._record_invocation(_ACTION_NAMES[action], timestamp)
 
     def publish_duration_metric(
         self, timestamp: datetime.datetime, action: Action, milliseconds: float
     ) -> None:
-        dimensions = {
-            "DimensionKeyActionType": action.name,
-            "DimensionKeyResourceType": self._resource_type,
-        }
-
-        self.publish_metric(
-            metric_name=MetricTypes.HandlerInvocationDuration,
-            dimensions=dimensions,
-            unit=StandardUnit.Milliseconds,
-            value=milliseconds,
-            timestamp=timestamp,
-        )
+        self._record_duration(_ACTION_NAMES[action], milliseconds, timestamp)
 
     def publish_log_delivery_exception_metric(
         self, timestamp: datetime.datetime, error: Any
     ) -> None:
-        dimensions = {
-            "DimensionKeyActionType": "ProviderLogDelivery",
-            "DimensionKeyExceptionType": str(type(error)),
-            "DimensionKeyResourceType": self._resource_type,
-        }
-        self.publish_metric(
-            metric_name=MetricTypes.HandlerException,
-            dimensions=dimensions,
-            unit=StandardUnit.Count,
-            value=1.0,
-            timestamp=timestamp,
+        self._emit(
+            MetricTypes.HandlerException,
+            "ProviderLogDelivery",
+            StandardUnit.Count,
+            1.0,
+            timestamp,
+            error,
         )
 
-    @staticmethod
-    def _make_namespace(resource_type: str) -> str:
-        suffix = resource_type.replace("::", "/")
-        return f"{METRIC_NAMESPACE_ROOT}/{suffix}"
-
 
 class HookMetricsPublisher(MetricsPublisher):
+    __slots__ = ("_hook_type", "_account_id")
+
+    _OPERATION_NAMES = _INVOCATION_POINT_NAMES.values()
+    _OPERATION_DIMENSION_KEY = "DimensionKeyInvocationPointType"
+    _TYPE_DIMENSION_KEY = "DimensionKeyHookType"
+
     def __init__(self, session: SessionProxy, hook_type: str, account_id: str) -> None:
         super().__init__(session, hook_type)
         self._hook_type = hook_type
         self._account_id = account_id
-        self._namespace = self._make_hook_namespace(hook_type, account_id)
+        self._namespace = _make_hook_namespace(hook_type, account_id)
 
     # pylint: disable=arguments-differ
     def publish_exception_metric(  # type: ignore
@@ -148,34 +431,20 @@ class HookMetricsPublisher(MetricsPublisher):
         invocation_point: HookInvocationPoint,
         error: Any,
     ) -> None:
-        dimensions: Mapping[str, str] = {
-            "DimensionKeyInvocationPointType": invocation_point.name,
-            "DimensionKeyExceptionType": str(type(error)),
-            "DimensionKeyHookType": self._hook_type,
-        }
-        self.publish_metric(
-            metric_name=MetricTypes.HandlerException,
-            dimensions=dimensions,
-            unit=StandardUnit.Count,
-            value=1.0,
-            timestamp=timestamp,
+        self._emit(
+            MetricTypes.HandlerException,
+            _INVOCATION_POINT_NAMES[invocation_point],
+            StandardUnit.Count,
+            1.0,
+            timestamp,
+            error,
         )
 
     # pylint: disable=arguments-differ
     def publish_invocation_metric(  # type: ignore
         self, timestamp: datetime.datetime, invocation_point: HookInvocationPoint
     ) -> None:
-        dimensions = {
-            "DimensionKeyInvocationPointType": invocation_point.name,
-            "DimensionKeyHookType": self._hook_type,
-        }
-        self.publish_metric(
-            metric_name=MetricTypes.HandlerInvocationCount,
-            dimensions=dimensions,
-            unit=StandardUnit.Count,
-            value=1.0,
-            timestamp=timestamp,
-        )
+        self._record_invocation(_INVOCATION_POINT_NAMES[invocation_point], timestamp)
 
     # pylint: disable=arguments-differ
     def publish_duration_metric(  # type: ignore
@@ -184,70 +453,169 @@ class HookMetricsPublisher(MetricsPublisher):
         invocation_point: HookInvocationPoint,
         milliseconds: float,
     ) -> None:
-        dimensions = {
-            "DimensionKeyInvocationPointType": invocation_point.name,
-            "DimensionKeyHookType": self._hook_type,
-        }
-
-        self.publish_metric(
-            metric_name=MetricTypes.HandlerInvocationDuration,
-            dimensions=dimensions,
-            unit=StandardUnit.Milliseconds,
-            value=milliseconds,
-            timestamp=timestamp,
+        self._record_duration(
+            _INVOCATION_POINT_NAMES[invocation_point], milliseconds, timestamp
         )
 
-    def publish_log_delivery_exception_metric(
-        self, timestamp: datetime.datetime, error: Any
+
+class _EmbeddedMetricWriter:
+    """Stands in for the CloudWatch client of a publisher, \
+    writing metric data to stdout in the CloudWatch embedded metric format \
+    instead of calling PutMetricData.
+    """
+
+    # keyword names mirror the boto3 client method this replaces
+    def put_metric_data(  # pylint: disable=invalid-name
+        self, Namespace: str, MetricData: List[MutableMapping[str, Any]]
     ) -> None:
-        dimensions = {
-            "DimensionKeyInvocationPointType": "ProviderLogDelivery",
-            "DimensionKeyExceptionType": str(type(error)),
-            "DimensionKeyHookType": self._hook_type,
-        }
-        self.publish_metric(
-            metric_name=MetricTypes.HandlerException,
-            dimensions=dimensions,
-            unit=StandardUnit.Count,
-            value=1.0,
-            timestamp=timestamp,
+        sys.stdout.write(
+            "".join(
+                self._to_document(Namespace, datum, values) + "\n"
+                for datum in MetricData
+                for values in self._chunk_values(datum)
+            )
         )
 
     @staticmethod
-    def _make_hook_namespace(hook_type: str, account_id: str) -> str:
-        suffix = hook_type.replace("::", "/")
-        return f"{METRIC_NAMESPACE_ROOT}/{account_id}/{suffix}"
+    def _chunk_values(datum: Mapping[str, Any]) -> Iterable[List[float]]:
+        if "Value" in datum:
+            values = [datum["Value"]]
+        else:
+            values = [
+                value
+                for value, count in zip(datum["Values"], datum["Counts"])
+                for _ in range(int(count))
+            ]
+        while values:
+            yield values[:MAX_VALUES_PER_EMBEDDED_METRIC]
+            values = values[MAX_VALUES_PER_EMBEDDED_METRIC:]
+
+    @staticmethod
+    def _to_document(
+        namespace: str, datum: Mapping[str, Any], values: List[float]
+    ) -> str:
+        timestamp = datum["Timestamp"]
+        if timestamp.tzinfo is None:
+            # naive timestamps are UTC, as produced by datetime.utcnow()
+            timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+        document: MutableMapping[str, Any] = {
+            "_aws": {
+                "Timestamp": int(timestamp.timestamp() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": namespace,
+                        "Dimensions": [[dim["Name"] for dim in datum["Dimensions"]]],
+                        "Metrics": [
+                            {"Name": datum["MetricName"], "Unit": datum["Unit"]}
+                        ],
+                    }
+                ],
+            }
+        }
+        for dim in datum["Dimensions"]:
+            document[dim["Name"]] = dim["Value"]
+        document[datum["MetricName"]] = values[0] if len(values) == 1 else values
+        return json.dumps(document)
+
+
+class EMFMetricsPublisher(MetricsPublisher):
+    """A metric publisher for code running in AWS Lambda.\
+    Instead of calling CloudWatch, \
+    metrics are written to stdout in the embedded metric format, \
+    which Lambda turns into CloudWatch metrics asynchronously.\
+    The metrics are created in the account running the function, \
+    not the account of the session's credentials.\
+    Can be used with the MetricsPublisherProxy.
+    """
+
+    __slots__ = ()
+
+    @staticmethod
+    def _make_client(session: SessionProxy) -> Any:
+        return _EmbeddedMetricWriter()
+
+    def _record_duration(
+        self, operation: str, milliseconds: float, timestamp: datetime.datetime
+    ) -> None:
+        # the embedded metric format has no statistic sets, so every duration
+        # is kept as a value
+        self._emit(
+            MetricTypes.HandlerInvocationDuration,
+            operation,
+            StandardUnit.Milliseconds,
+            milliseconds,
+            timestamp,
+        )
+
+
+class EMFHookMetricsPublisher(EMFMetricsPublisher, HookMetricsPublisher):
+    """The embedded metric format variant of the HookMetricsPublisher"""
+
+    __slots__ = ()
 
 
 class MetricsPublisherProxy:
     """A proxy for publishing metrics to multiple publishers. \
-    Iterates over available publishers and publishes.
+    Iterates over available publishers and publishes. \
+    Metrics are buffered while the handler runs and sent by flush, \
+    with one PutMetricData call per publisher.
 
     Functions:
     ----------
-    add_metrics_publisher: Adds a metrics publisher to the list of publishers
+    add_metrics_publisher: Adds a metrics publisher to the list of publishers. \
+    When opted in, publishers write the embedded metric format to stdout
+
+    add_hook_metrics_publisher: Adds a hook metrics publisher to the list of \
+    publishers
 
     publish_exception_metric: \
-    Publishes an exception based metric to the list of publishers
+    Publishes an exception based metric to the resource publishers
+
+    publish_hook_exception_metric: \
+    Publishes an exception based metric to the hook publishers
 
     publish_invocation_metric: \
-    Publishes a metric related to invocations to the list of publishers
+    Publishes a metric related to invocations to the resource publishers
+
+    publish_hook_invocation_metric: \
+    Publishes a metric related to invocations to the hook publishers
+
+    publish_duration_metric: Publishes a duration metric to the resource publishers
 
-    publish_duration_metric: Publishes a duration metric to the list of publishers
+    publish_hook_duration_metric: Publishes a duration metric to the hook publishers
 
     publish_log_delivery_exception_metric: \
      Publishes a log delivery exception metric to the list of publishers
+
+    flush: Sends the metrics buffered by each publisher
+
+    has_publishers: Whether any publisher has been added
     """
 
+    # the proxy drives its publishers through their shared _emit helper
+    # pylint: disable=protected-access
+
     def __init__(self) -> None:
-        self._publishers: List[MetricsPublisher] = []
+        # only grow while the proxy is set up, and tuples are cheaper to iterate
+        # for every metric published afterwards. resource and hook publishers
+        # are kept apart, so each publish method knows the operation type
+        self._resource_publishers: Tuple[MetricsPublisher, ...] = ()
+        self._hook_publishers: Tuple[HookMetricsPublisher, ...] = ()
+
+    @property
+    def has_publishers(self) -> bool:
+        # lets callers skip building metric inputs when nothing would be sent
+        return bool(self._resource_publishers or self._hook_publishers)
 
     def add_metrics_publisher(
         self, session: Optional[SessionProxy], type_name: Optional[str]
     ) -> None:
         if session and type_name:
-            publisher = MetricsPublisher(session, type_name)
-            self._publishers.append(publisher)
+            if _use_embedded_metric_format():
+                publisher: MetricsPublisher = EMFMetricsPublisher(session, type_name)
+            else:
+                publisher = MetricsPublisher(session, type_name)
+            self._resource_publishers += (publisher,)
 
     def add_hook_metrics_publisher(
         self,
@@ -256,38 +624,133 @@ class MetricsPublisherProxy:
         account_id: Optional[str],
     ) -> None:
         if session and type_name and account_id:
-            publisher = HookMetricsPublisher(session, type_name, account_id)
-            self._publishers.append(publisher)
+            if _use_embedded_metric_format():
+                publisher: HookMetricsPublisher = EMFHookMetricsPublisher(
+                    session, type_name, account_id
+                )
+            else:
+                publisher = HookMetricsPublisher(session, type_name, account_id)
+            self._hook_publishers += (publisher,)
 
     def publish_exception_metric(
+        self, timestamp: datetime.datetime, action: Action, error: Any
+    ) -> None:
+        if self._resource_publishers:
+            self._publish_exception(
+                self._resource_publishers, _ACTION_NAMES[action], timestamp, error
+            )
+
+    def publish_hook_exception_metric(
         self,
         timestamp: datetime.datetime,
-        action: Union[Action, HookInvocationPoint],
+        invocation_point: HookInvocationPoint,
         error: Any,
     ) -> None:
-        for publisher in self._publishers:
-            publisher.publish_exception_metric(timestamp, action, error)  # type: ignore
+        if self._hook_publishers:
+            self._publish_exception(
+                self._hook_publishers,
+                _INVOCATION_POINT_NAMES[invocation_point],
+                timestamp,
+                error,
+            )
 
     def publish_invocation_metric(
-        self, timestamp: datetime.datetime, action: Union[Action, HookInvocationPoint]
+        self, timestamp: datetime.datetime, action: Action
+    ) -> None:
+        if self._resource_publishers:
+            self._publish_invocation(
+                self._resource_publishers, _ACTION_NAMES[action], timestamp
+            )
+
+    def publish_hook_invocation_metric(
+        self, timestamp: datetime.datetime, invocation_point: HookInvocationPoint
     ) -> None:
-        for publisher in self._publishers:
-            publisher.publish_invocation_metric(timestamp, action)  # type: ignore
+        if self._hook_publishers:
+            self._publish_invocation(
+                self._hook_publishers,
+                _INVOCATION_POINT_NAMES[invocation_point],
+                timestamp,
+            )
 
-    # pylint: disable=line-too-long
     def publish_duration_metric(
+        self, timestamp: datetime.datetime, action: Action, milliseconds: float
+    ) -> None:
+        if self._resource_publishers:
+            self._publish_duration(
+                self._resource_publishers,
+                _ACTION_NAMES[action],
+                milliseconds,
+                timestamp,
+            )
+
+    def publish_hook_duration_metric(
         self,
         timestamp: datetime.datetime,
-        action: Union[Action, HookInvocationPoint],
+        invocation_point: HookInvocationPoint,
         milliseconds: float,
     ) -> None:
-        # fmt off
-        for publisher in self._publishers:
-            publisher.publish_duration_metric(timestamp, action, milliseconds)  # type: ignore
-        # fmt on
+        if self._hook_publishers:
+            self._publish_duration(
+                self._hook_publishers,
+                _INVOCATION_POINT_NAMES[invocation_point],
+                milliseconds,
+                timestamp,
+            )
 
     def publish_log_delivery_exception_metric(
         self, timestamp: datetime.datetime, error: Any
     ) -> None:
-        for publisher in self._publishers:
+        for publisher in self._all_publishers():
             publisher.publish_log_delivery_exception_metric(timestamp, error)
+
+    def flush(self) -> None:
+        self._flush_publishers(self._all_publishers())
+
+    def _all_publishers(self) -> Tuple[MetricsPublisher, ...]:
+        return self._resource_publishers + self._hook_publishers
+
+    def _publish_exception(
+        self,
+        publishers: Iterable[MetricsPublisher],
+        operation: str,
+        timestamp: datetime.datetime,
+        error: Any,
+    ) -> None:
+        for publisher in publishers:
+            publisher._emit(
+                MetricTypes.HandlerException,
+                operation,
+                StandardUnit.Count,
+                1.0,
+                timestamp,
+                error,
+            )
+
+    def _publish_invocation(
+        self,
+        publishers: Iterable[MetricsPublisher],
+        operation: str,
+        timestamp: datetime.datetime,
+    ) -> None:
+        for publisher in publishers:
+            publisher._record_invocation(operation, timestamp)
+
+    def _publish_duration(
+        self,
+        publishers: Iterable[MetricsPublisher],
+        operation: str,
+        milliseconds: float,
+        timestamp: datetime.datetime,
+    ) -> None:
+        for publisher in publishers:
+            publisher._record_duration(operation, milliseconds, timestamp)
+
+    @staticmethod
+    def _flush_publishers(publishers: Iterable[MetricsPublisher]) -> None:
+        # the single place send errors are handled. metrics are best effort,
+        # so a failed batch is logged and dropped rather than retried
+        for publisher in publishers:
+            try:
+                publisher.flush()
+            except Exception as e:  # pylint: disable=broad-except
+                LOG.warning("An error occurred while publishing metrics: %s", str(e))
@@ -192,13 +192,13 @@ class Resource:
                 print(message)
                 traceback.print_exc()
 
+        metrics = MetricsPublisherProxy()
         try:
             sessions, action, callback, event = self._parse_request(event_data)
             caller_sess, provider_sess = sessions
 
             request = self._cast_resource_request(event)
 
-            metrics = MetricsPublisherProxy()
             if event.requestData.providerLogGroupName and provider_sess:
                 ProviderLogHandler.setup(event, provider_sess)
                 logs_setup = True
@@ -226,6 +226,8 @@ class Resource:
         except BaseException as e:  # pylint: disable=broad-except
             print_or_log("Base exception caught (this is usually bad) {0}".format(e))
             progress = ProgressEvent.failed(HandlerErrorCode.InternalFailure)
+        finally:
+            metrics.flush()
 
         if progress.result:
             progress.result = None
@@ -14,7 +14,7 @@ setup(
     zip_safe=True,
     python_requires=">=3.6",
     install_requires=[
-        "boto3>=1.10.20",
+        "boto3>=1.12.0",
         "aws-encryption-sdk==2.0.0",
         'dataclasses;python_version<"3.7"',
     ],
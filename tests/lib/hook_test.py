@@ -127,7 +127,8 @@ def test_entrypoint_handler_raises():
             hook, ENTRYPOINT_PAYLOAD, None
         )
 
-    mock_metrics.return_value.publish_exception_metric.assert_called_once()
+    mock_metrics.return_value.publish_hook_exception_metric.assert_called_once()
+    mock_metrics.return_value.flush.assert_called_once()
 
     assert event == {
         "errorCode": "InvalidRequest",
@@ -1,10 +1,14 @@
 # auto enums `.name` causes no-member
 # pylint: disable=redefined-outer-name,no-member,protected-access
-from datetime import datetime
+import json
+import os
+from datetime import datetime, timedelta
 from unittest.mock import Mock, call, patch
+from uuid import uuid4
 
 import boto3
 import pytest
+from cloudformation_cli_python_lib.boto3_proxy import _get_boto_session
 from cloudformation_cli_python_lib.interface import (
     Action,
     HookInvocationPoint,
@@ -12,24 +16,45 @@ from cloudformation_cli_python_lib.interface import (
     StandardUnit,
 )
 from cloudformation_cli_python_lib.metrics import (
+    CLOUDWATCH_CLIENT_CONFIG,
+    EMBEDDED_METRIC_FORMAT_ENV,
+    MAX_METRIC_DATA_PER_REQUEST,
+    EMFHookMetricsPublisher,
+    EMFMetricsPublisher,
     HookMetricsPublisher,
     MetricsPublisher,
     MetricsPublisherProxy,
+    _cloudwatch_client,
+    _exception_type_name,
+    _make_hook_namespace,
+    _make_namespace,
+    _shared_dimensions,
+    _type_name,
     format_dimensions,
 )
+from cloudformation_cli_python_lib.utils import Credentials
 
 from botocore.stub import Stubber  # pylint: disable=C0411
 
 ACCOUNT_ID = "123456789012"
 RESOURCE_TYPE = "Aa::Bb::Cc"
-RESOURCE_NAMESPACE = MetricsPublisher._make_namespace(RESOURCE_TYPE)
+RESOURCE_NAMESPACE = _make_namespace(RESOURCE_TYPE)
 HOOK_TYPE = "De::Ee::Ff"
-HOOK_NAMESPACE = HookMetricsPublisher._make_hook_namespace(HOOK_TYPE, ACCOUNT_ID)
+HOOK_NAMESPACE = _make_hook_namespace(HOOK_TYPE, ACCOUNT_ID)
 
 
 @pytest.fixture
 def mock_session():
-    return Mock(spec_set=["client"])
+    session = Mock(spec_set=["client", "session"])
+    # a real session, so reading its credentials is not recorded as a call,
+    # and a token of its own, so each test gets a client of its own
+    session.session = boto3.session.Session(
+        aws_access_key_id="access-key",
+        aws_secret_access_key="secret-key",
+        aws_session_token=str(uuid4()),
+        region_name="us-east-1",
+    )
+    return session
 
 
 def test_format_dimensions():
@@ -41,6 +66,75 @@ def test_format_dimensions():
     ]
 
 
+def test_make_namespace():
+    assert RESOURCE_NAMESPACE == "AWS/CloudFormation/Aa/Bb/Cc"
+    assert _make_namespace(RESOURCE_TYPE) is RESOURCE_NAMESPACE
+    assert HOOK_NAMESPACE == "AWS/CloudFormation/123456789012/De/Ee/Ff"
+    assert _make_hook_namespace(HOOK_TYPE, ACCOUNT_ID) is HOOK_NAMESPACE
+
+
+def test_cloudwatch_client_fails_fast():
+    assert CLOUDWATCH_CLIENT_CONFIG.retries == {
+        "total_max_attempts": 1,
+        "mode": "standard",
+    }
+    assert CLOUDWATCH_CLIENT_CONFIG.connect_timeout == 0.5
+    assert CLOUDWATCH_CLIENT_CONFIG.read_timeout == 1.0
+
+
+def test_format_dimensions_not_shared():
+    dimensions = {"MyDimensionKey": "val_1", "MyDimensionKey2": "val_2"}
+    assert format_dimensions(dimensions) is not format_dimensions(dimensions)
+    assert _shared_dimensions(dimensions) is _shared_dimensions(dict(dimensions))
+
+
+def test_exception_type_name():
+    class CustomError(Exception):
+        pass
+
+    name = _exception_type_name(CustomError())
+    assert name == f"{__name__}.test_exception_type_name.<locals>.CustomError"
+    assert _exception_type_name(CustomError()) is name
+    assert _exception_type_name(ValueError()) == "builtins.ValueError"
+    # local classes like this one must not pile up in the cache
+    assert _type_name.cache_info().maxsize is not None
+
+
+@pytest.mark.parametrize(
+    "publisher_cls,args",
+    [
+        (MetricsPublisher, (RESOURCE_TYPE,)),
+        (HookMetricsPublisher, (HOOK_TYPE, ACCOUNT_ID)),
+        (EMFMetricsPublisher, (RESOURCE_TYPE,)),
+        (EMFHookMetricsPublisher, (HOOK_TYPE, ACCOUNT_ID)),
+    ],
+)
+def test_publishers_have_no_instance_dict(mock_session, publisher_cls, args):
+    publisher = publisher_cls(mock_session, *args)
+    assert not hasattr(publisher, "__dict__")
+
+
+def test_publishers_share_cloudwatch_client(mock_session):
+    publisher = MetricsPublisher(mock_session, RESOURCE_TYPE)
+    hook_publisher = HookMetricsPublisher(mock_session, HOOK_TYPE, ACCOUNT_ID)
+
+    mock_session.client.assert_called_once_with(
+        "cloudwatch", config=CLOUDWATCH_CLIENT_CONFIG
+    )
+    assert publisher._client is hook_publisher._client
+
+
+def test_cloudwatch_client_shared_between_sessions():
+    credentials = Credentials("access-key", "secret-key", "token")
+    client = _cloudwatch_client(_get_boto_session(credentials, "us-east-1"))
+
+    assert client is _cloudwatch_client(_get_boto_session(credentials, "us-east-1"))
+    assert client is not _cloudwatch_client(_get_boto_session(credentials, "us-west-2"))
+    assert client is not _cloudwatch_client(
+        _get_boto_session(Credentials("access-key", "secret-key", "token2"))
+    )
+
+
 def test_put_metric_catches_error(mock_session):
     client = boto3.client("cloudwatch")
     stubber = Stubber(client)
@@ -66,10 +160,11 @@ def test_put_metric_catches_error(mock_session):
             1.0,
             datetime.now(),
         )
+        MetricsPublisherProxy._flush_publishers([publisher])
 
     stubber.deactivate()
     expected_calls = [
-        call.error(
+        call.warning(
             "An error occurred while publishing metrics: %s",
             "An error occurred (InternalServiceError) when calling the "
             "PutMetricData operation: ",
@@ -83,8 +178,9 @@ def test_publish_exception_metric(mock_session):
     proxy = MetricsPublisherProxy()
     proxy.add_metrics_publisher(mock_session, RESOURCE_TYPE)
     proxy.publish_exception_metric(fake_datetime, Action.CREATE, Exception("fake-err"))
+    proxy.flush()
     expected_calls = [
-        call.client("cloudwatch"),
+        call.client("cloudwatch", config=CLOUDWATCH_CLIENT_CONFIG),
         call.client().put_metric_data(
             Namespace="AWS/CloudFormation/Aa/Bb/Cc",
             MetricData=[
@@ -94,12 +190,12 @@ def test_publish_exception_metric(mock_session):
                         {"Name": "DimensionKeyActionType", "Value": "CREATE"},
                         {
                             "Name": "DimensionKeyExceptionType",
-                            "Value": "<class 'Exception'>",
+                            "Value": "builtins.Exception",
                         },
                         {"Name": "DimensionKeyResourceType", "Value": "Aa::Bb::Cc"},
                     ],
                     "Unit": StandardUnit.Count.name,
-                    "Timestamp": str(fake_datetime),
+                    "Timestamp": fake_datetime,
                     "Value": 1.0,
                 }
             ],
@@ -113,9 +209,10 @@ def test_publish_invocation_metric(mock_session):
     proxy = MetricsPublisherProxy()
     proxy.add_metrics_publisher(mock_session, RESOURCE_TYPE)
     proxy.publish_invocation_metric(fake_datetime, Action.CREATE)
+    proxy.flush()
 
     expected_calls = [
-        call.client("cloudwatch"),
+        call.client("cloudwatch", config=CLOUDWATCH_CLIENT_CONFIG),
         call.client().put_metric_data(
             Namespace="AWS/CloudFormation/Aa/Bb/Cc",
             MetricData=[
@@ -126,7 +223,7 @@ def test_publish_invocation_metric(mock_session):
                         {"Name": "DimensionKeyResourceType", "Value": "Aa::Bb::Cc"},
                     ],
                     "Unit": StandardUnit.Count.name,
-                    "Timestamp": str(fake_datetime),
+                    "Timestamp": fake_datetime,
                     "Value": 1.0,
                 }
             ],
@@ -140,9 +237,10 @@ def test_publish_duration_metric(mock_session):
     proxy = MetricsPublisherProxy()
     proxy.add_metrics_publisher(mock_session, RESOURCE_TYPE)
     proxy.publish_duration_metric(fake_datetime, Action.CREATE, 100)
+    proxy.flush()
 
     expected_calls = [
-        call.client("cloudwatch"),
+        call.client("cloudwatch", config=CLOUDWATCH_CLIENT_CONFIG),
         call.client().put_metric_data(
             Namespace="AWS/CloudFormation/Aa/Bb/Cc",
             MetricData=[
@@ -153,7 +251,7 @@ def test_publish_duration_metric(mock_session):
                         {"Name": "DimensionKeyResourceType", "Value": "Aa::Bb::Cc"},
                     ],
                     "Unit": StandardUnit.Milliseconds.name,
-                    "Timestamp": str(fake_datetime),
+                    "Timestamp": fake_datetime,
                     "Value": 100,
                 }
             ],
@@ -167,9 +265,10 @@ def test_publish_log_delivery_exception_metric(mock_session):
     proxy = MetricsPublisherProxy()
     proxy.add_metrics_publisher(mock_session, RESOURCE_TYPE)
     proxy.publish_log_delivery_exception_metric(fake_datetime, TypeError("test"))
+    proxy.flush()
 
     expected_calls = [
-        call.client("cloudwatch"),
+        call.client("cloudwatch", config=CLOUDWATCH_CLIENT_CONFIG),
         call.client().put_metric_data(
             Namespace="AWS/CloudFormation/Aa/Bb/Cc",
             MetricData=[
@@ -182,12 +281,12 @@ def test_publish_log_delivery_exception_metric(mock_session):
                         },
                         {
                             "Name": "DimensionKeyExceptionType",
-                            "Value": "<class 'TypeError'>",
+                            "Value": "builtins.TypeError",
                         },
                         {"Name": "DimensionKeyResourceType", "Value": "Aa::Bb::Cc"},
                     ],
                     "Unit": StandardUnit.Count.name,
-                    "Timestamp": str(fake_datetime),
+                    "Timestamp": fake_datetime,
                     "Value": 1.0,
                 }
             ],
@@ -221,10 +320,11 @@ def test_put_hook_metric_catches_error(mock_session):
             1.0,
             datetime.now(),
         )
+        MetricsPublisherProxy._flush_publishers([publisher])
 
     stubber.deactivate()
     expected_calls = [
-        call.error(
+        call.warning(
             "An error occurred while publishing metrics: %s",
             "An error occurred (InternalServiceError) when calling the "
             "PutMetricData operation: ",
@@ -237,11 +337,12 @@ def test_publish_hook_exception_metric(mock_session):
     fake_datetime = datetime(2019, 1, 1)
     proxy = MetricsPublisherProxy()
     proxy.add_hook_metrics_publisher(mock_session, HOOK_TYPE, ACCOUNT_ID)
-    proxy.publish_exception_metric(
+    proxy.publish_hook_exception_metric(
         fake_datetime, HookInvocationPoint.CREATE_PRE_PROVISION, Exception("fake-err")
     )
+    proxy.flush()
     expected_calls = [
-        call.client("cloudwatch"),
+        call.client("cloudwatch", config=CLOUDWATCH_CLIENT_CONFIG),
         call.client().put_metric_data(
             Namespace="AWS/CloudFormation/123456789012/De/Ee/Ff",
             MetricData=[
@@ -254,12 +355,12 @@ def test_publish_hook_exception_metric(mock_session):
                         },
                         {
                             "Name": "DimensionKeyExceptionType",
-                            "Value": "<class 'Exception'>",
+                            "Value": "builtins.Exception",
                         },
                         {"Name": "DimensionKeyHookType", "Value": "De::Ee::Ff"},
                     ],
                     "Unit": StandardUnit.Count.name,
-                    "Timestamp": str(fake_datetime),
+                    "Timestamp": fake_datetime,
                     "Value": 1.0,
                 }
             ],
@@ -272,12 +373,13 @@ def test_publish_hook_invocation_metric(mock_session):
     fake_datetime = datetime(2019, 1, 1)
     proxy = MetricsPublisherProxy()
     proxy.add_hook_metrics_publisher(mock_session, HOOK_TYPE, ACCOUNT_ID)
-    proxy.publish_invocation_metric(
+    proxy.publish_hook_invocation_metric(
         fake_datetime, HookInvocationPoint.CREATE_PRE_PROVISION
     )
+    proxy.flush()
 
     expected_calls = [
-        call.client("cloudwatch"),
+        call.client("cloudwatch", config=CLOUDWATCH_CLIENT_CONFIG),
         call.client().put_metric_data(
             Namespace="AWS/CloudFormation/123456789012/De/Ee/Ff",
             MetricData=[
@@ -291,7 +393,7 @@ def test_publish_hook_invocation_metric(mock_session):
                         {"Name": "DimensionKeyHookType", "Value": "De::Ee::Ff"},
                     ],
                     "Unit": StandardUnit.Count.name,
-                    "Timestamp": str(fake_datetime),
+                    "Timestamp": fake_datetime,
                     "Value": 1.0,
                 }
             ],
@@ -304,12 +406,13 @@ def test_publish_hook_duration_metric(mock_session):
     fake_datetime = datetime(2019, 1, 1)
     proxy = MetricsPublisherProxy()
     proxy.add_hook_metrics_publisher(mock_session, HOOK_TYPE, ACCOUNT_ID)
-    proxy.publish_duration_metric(
+    proxy.publish_hook_duration_metric(
         fake_datetime, HookInvocationPoint.CREATE_PRE_PROVISION, 100
     )
+    proxy.flush()
 
     expected_calls = [
-        call.client("cloudwatch"),
+        call.client("cloudwatch", config=CLOUDWATCH_CLIENT_CONFIG),
         call.client().put_metric_data(
             Namespace="AWS/CloudFormation/123456789012/De/Ee/Ff",
             MetricData=[
@@ -323,7 +426,7 @@ def test_publish_hook_duration_metric(mock_session):
                         {"Name": "DimensionKeyHookType", "Value": "De::Ee::Ff"},
                     ],
                     "Unit": StandardUnit.Milliseconds.name,
-                    "Timestamp": str(fake_datetime),
+                    "Timestamp": fake_datetime,
                     "Value": 100,
                 }
             ],
@@ -337,9 +440,10 @@ def test_publish_hook_log_delivery_exception_metric(mock_session):
     proxy = MetricsPublisherProxy()
     proxy.add_hook_metrics_publisher(mock_session, HOOK_TYPE, ACCOUNT_ID)
     proxy.publish_log_delivery_exception_metric(fake_datetime, TypeError("test"))
+    proxy.flush()
 
     expected_calls = [
-        call.client("cloudwatch"),
+        call.client("cloudwatch", config=CLOUDWATCH_CLIENT_CONFIG),
         call.client().put_metric_data(
             Namespace="AWS/CloudFormation/123456789012/De/Ee/Ff",
             MetricData=[
@@ -352,12 +456,12 @@ def test_publish_hook_log_delivery_exception_metric(mock_session):
                         },
                         {
                             "Name": "DimensionKeyExceptionType",
-                            "Value": "<class 'TypeError'>",
+                            "Value": "builtins.TypeError",
                         },
                         {"Name": "DimensionKeyHookType", "Value": "De::Ee::Ff"},
                     ],
                     "Unit": StandardUnit.Count.name,
-                    "Timestamp": str(fake_datetime),
+                    "Timestamp": fake_datetime,
                     "Value": 1.0,
                 }
             ],
@@ -366,8 +470,373 @@ def test_publish_hook_log_delivery_exception_metric(mock_session):
     assert mock_session.mock_calls == expected_calls
 
 
+def test_publish_metrics_batched_into_single_call(mock_session):
+    fake_datetime = datetime(2019, 1, 1)
+    proxy = MetricsPublisherProxy()
+    proxy.add_metrics_publisher(mock_session, RESOURCE_TYPE)
+    proxy.publish_invocation_metric(fake_datetime, Action.CREATE)
+    proxy.publish_duration_metric(fake_datetime, Action.CREATE, 100)
+    proxy.publish_exception_metric(fake_datetime, Action.CREATE, Exception("fake-err"))
+
+    mock_session.client.return_value.put_metric_data.assert_not_called()
+    proxy.flush()
+
+    put_metric_data = mock_session.client.return_value.put_metric_data
+    put_metric_data.assert_called_once()
+    _args, kwargs = put_metric_data.call_args
+    assert [datum["MetricName"] for datum in kwargs["MetricData"]] == [
+        MetricTypes.HandlerInvocationCount.name,
+        MetricTypes.HandlerException.name,
+        MetricTypes.HandlerInvocationDuration.name,
+    ]
+
+    # the buffer is emptied by a flush
+    proxy.flush()
+    put_metric_data.assert_called_once()
+
+
+def test_publish_does_not_modify_datum_templates(mock_session):
+    publisher = MetricsPublisher(mock_session, RESOURCE_TYPE)
+    for timestamp in (datetime(2019, 1, 1), datetime(2019, 1, 2)):
+        publisher._emit(
+            MetricTypes.HandlerInvocationCount,
+            Action.CREATE.name,
+            StandardUnit.Count,
+            1.0,
+            timestamp,
+        )
+
+    assert [datum["Timestamp"] for datum in publisher._buffer] == [
+        datetime(2019, 1, 1),
+        datetime(2019, 1, 2),
+    ]
+    assert publisher._datum_templates[
+        MetricTypes.HandlerInvocationCount, Action.CREATE.name
+    ] == {
+        "MetricName": MetricTypes.HandlerInvocationCount.name,
+        "Dimensions": [
+            {"Name": "DimensionKeyActionType", "Value": "CREATE"},
+            {"Name": "DimensionKeyResourceType", "Value": "Aa::Bb::Cc"},
+        ],
+        "Unit": StandardUnit.Count.name,
+    }
+
+
+def publish_invocation_datum(publisher, timestamp):
+    # bypasses the invocation counter, so every call buffers its own datum
+    publisher.publish_metric(
+        MetricTypes.HandlerInvocationCount,
+        {
+            "DimensionKeyActionType": Action.CREATE.name,
+            "DimensionKeyResourceType": RESOURCE_TYPE,
+        },
+        StandardUnit.Count,
+        1.0,
+        timestamp,
+    )
+
+
+def test_flush_counts_invocations(mock_session):
+    fake_datetime = datetime(2019, 1, 1)
+    publisher = MetricsPublisher(mock_session, RESOURCE_TYPE)
+    for seconds in range(3):
+        publisher.publish_invocation_metric(
+            fake_datetime + timedelta(seconds=seconds), Action.CREATE
+        )
+    publisher.publish_invocation_metric(fake_datetime, Action.DELETE)
+    assert publisher._buffer == []
+    publisher.flush()
+
+    mock_session.client.return_value.put_metric_data.assert_called_once_with(
+        Namespace="AWS/CloudFormation/Aa/Bb/Cc",
+        MetricData=[
+            {
+                "MetricName": MetricTypes.HandlerInvocationCount.name,
+                "Dimensions": [
+                    {"Name": "DimensionKeyActionType", "Value": "CREATE"},
+                    {"Name": "DimensionKeyResourceType", "Value": "Aa::Bb::Cc"},
+                ],
+                "Unit": StandardUnit.Count.name,
+                "Timestamp": fake_datetime + timedelta(seconds=2),
+                "Values": [1.0],
+                "Counts": [3.0],
+            },
+            {
+                "MetricName": MetricTypes.HandlerInvocationCount.name,
+                "Dimensions": [
+                    {"Name": "DimensionKeyActionType", "Value": "DELETE"},
+                    {"Name": "DimensionKeyResourceType", "Value": "Aa::Bb::Cc"},
+                ],
+                "Unit": StandardUnit.Count.name,
+                "Timestamp": fake_datetime,
+                "Value": 1.0,
+            },
+        ],
+    )
+
+    # the counters are reset by a flush
+    publisher.flush()
+    mock_session.client.return_value.put_metric_data.assert_called_once()
+
+
+def test_flush_chunks_metric_data(mock_session):
+    fake_datetime = datetime(2019, 1, 1)
+    publisher = MetricsPublisher(mock_session, RESOURCE_TYPE)
+    for minutes in range(MAX_METRIC_DATA_PER_REQUEST + 1):
+        publish_invocation_datum(publisher, fake_datetime + timedelta(minutes=minutes))
+    publisher.flush()
+
+    put_metric_data = mock_session.client.return_value.put_metric_data
+    assert [
+        len(kwargs["MetricData"]) for _args, kwargs in put_metric_data.call_args_list
+    ] == [MAX_METRIC_DATA_PER_REQUEST, 1]
+
+
+def test_flush_survives_publish_error(mock_session):
+    put_metric_data = mock_session.client.return_value.put_metric_data
+    put_metric_data.side_effect = [ValueError("boom"), None]
+    proxy = MetricsPublisherProxy()
+    proxy.add_metrics_publisher(mock_session, RESOURCE_TYPE)
+
+    with patch("cloudformation_cli_python_lib.metrics.LOG") as mock_logger:
+        proxy.publish_invocation_metric(datetime(2019, 1, 1), Action.CREATE)
+        proxy.flush()
+        proxy.publish_invocation_metric(datetime(2019, 1, 1), Action.CREATE)
+        proxy.flush()
+
+    mock_logger.warning.assert_called_once_with(
+        "An error occurred while publishing metrics: %s", "boom"
+    )
+    assert put_metric_data.call_count == 2
+
+
+def test_metrics_publisher_proxy_flush_without_publishers():
+    proxy = MetricsPublisherProxy()
+    proxy.flush()
+
+
+def test_flush_coalesces_metric_data(mock_session):
+    fake_datetime = datetime(2019, 1, 1, 0, 0, 10)
+    publisher = MetricsPublisher(mock_session, RESOURCE_TYPE)
+    publish_invocation_datum(publisher, fake_datetime)
+    publish_invocation_datum(publisher, fake_datetime + timedelta(seconds=30))
+    publish_invocation_datum(publisher, fake_datetime + timedelta(minutes=1))
+    publisher.flush()
+
+    dimensions = [
+        {"Name": "DimensionKeyActionType", "Value": "CREATE"},
+        {"Name": "DimensionKeyResourceType", "Value": "Aa::Bb::Cc"},
+    ]
+    mock_session.client.return_value.put_metric_data.assert_called_once_with(
+        Namespace="AWS/CloudFormation/Aa/Bb/Cc",
+        MetricData=[
+            {
+                "MetricName": MetricTypes.HandlerInvocationCount.name,
+                "Dimensions": dimensions,
+                "Unit": StandardUnit.Count.name,
+                "Timestamp": datetime(2019, 1, 1),
+                "Values": [1.0],
+                "Counts": [2.0],
+            },
+            {
+                "MetricName": MetricTypes.HandlerInvocationCount.name,
+                "Dimensions": dimensions,
+                "Unit": StandardUnit.Count.name,
+                "Timestamp": fake_datetime + timedelta(minutes=1),
+                "Value": 1.0,
+            },
+        ],
+    )
+
+
+def test_flush_sends_duration_statistic_set(mock_session):
+    fake_datetime = datetime(2019, 1, 1)
+    publisher = MetricsPublisher(mock_session, RESOURCE_TYPE)
+    for seconds, milliseconds in enumerate((100, 300, 50)):
+        publisher.publish_duration_metric(
+            fake_datetime + timedelta(seconds=seconds), Action.CREATE, milliseconds
+        )
+    publisher.publish_duration_metric(fake_datetime, Action.DELETE, 10)
+    publisher.flush()
+
+    mock_session.client.return_value.put_metric_data.assert_called_once_with(
+        Namespace="AWS/CloudFormation/Aa/Bb/Cc",
+        MetricData=[
+            {
+                "MetricName": MetricTypes.HandlerInvocationDuration.name,
+                "Dimensions": [
+                    {"Name": "DimensionKeyActionType", "Value": "CREATE"},
+                    {"Name": "DimensionKeyResourceType", "Value": "Aa::Bb::Cc"},
+                ],
+                "Unit": StandardUnit.Milliseconds.name,
+                "Timestamp": fake_datetime + timedelta(seconds=2),
+                "StatisticValues": {
+                    "SampleCount": 3.0,
+                    "Sum": 450,
+                    "Minimum": 50,
+                    "Maximum": 300,
+                },
+            },
+            {
+                "MetricName": MetricTypes.HandlerInvocationDuration.name,
+                "Dimensions": [
+                    {"Name": "DimensionKeyActionType", "Value": "DELETE"},
+                    {"Name": "DimensionKeyResourceType", "Value": "Aa::Bb::Cc"},
+                ],
+                "Unit": StandardUnit.Milliseconds.name,
+                "Timestamp": fake_datetime,
+                "Value": 10,
+            },
+        ],
+    )
+
+    # the aggregates are reset by a flush
+    publisher.flush()
+    mock_session.client.return_value.put_metric_data.assert_called_once()
+
+
+@pytest.fixture
+def embedded_metric_format():
+    with patch.dict(os.environ, {EMBEDDED_METRIC_FORMAT_ENV: "true"}):
+        yield
+
+
+def test_embedded_metric_format_not_used_by_default(mock_session):
+    proxy = MetricsPublisherProxy()
+    with patch.dict(os.environ, {"AWS_LAMBDA_FUNCTION_NAME": "handler"}):
+        proxy.add_metrics_publisher(mock_session, RESOURCE_TYPE)
+    assert not isinstance(proxy._resource_publishers[0], EMFMetricsPublisher)
+
+
+@pytest.mark.usefixtures("embedded_metric_format")
+def test_publish_embedded_metric_format(mock_session, capsys):
+    fake_datetime = datetime(2019, 1, 1)
+    proxy = MetricsPublisherProxy()
+    proxy.add_metrics_publisher(mock_session, RESOURCE_TYPE)
+    assert isinstance(proxy._resource_publishers[0], EMFMetricsPublisher)
+
+    proxy.publish_invocation_metric(fake_datetime, Action.CREATE)
+    proxy.publish_duration_metric(fake_datetime, Action.CREATE, 100)
+    proxy.publish_duration_metric(fake_datetime, Action.CREATE, 100)
+    proxy.flush()
+
+    mock_session.client.assert_not_called()
+    documents = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert documents == [
+        {
+            "_aws": {
+                "Timestamp": 1546300800000,
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": "AWS/CloudFormation/Aa/Bb/Cc",
+                        "Dimensions": [
+                            ["DimensionKeyActionType", "DimensionKeyResourceType"]
+                        ],
+                        "Metrics": [
+                            {
+                                "Name": MetricTypes.HandlerInvocationCount.name,
+                                "Unit": StandardUnit.Count.name,
+                            }
+                        ],
+                    }
+                ],
+            },
+            "DimensionKeyActionType": "CREATE",
+            "DimensionKeyResourceType": "Aa::Bb::Cc",
+            MetricTypes.HandlerInvocationCount.name: 1.0,
+        },
+        {
+            "_aws": {
+                "Timestamp": 1546300800000,
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": "AWS/CloudFormation/Aa/Bb/Cc",
+                        "Dimensions": [
+                            ["DimensionKeyActionType", "DimensionKeyResourceType"]
+                        ],
+                        "Metrics": [
+                            {
+                                "Name": MetricTypes.HandlerInvocationDuration.name,
+                                "Unit": StandardUnit.Milliseconds.name,
+                            }
+                        ],
+                    }
+                ],
+            },
+            "DimensionKeyActionType": "CREATE",
+            "DimensionKeyResourceType": "Aa::Bb::Cc",
+            MetricTypes.HandlerInvocationDuration.name: [100, 100],
+        },
+    ]
+
+
+@pytest.mark.usefixtures("embedded_metric_format")
+def test_publish_hook_embedded_metric_format(mock_session, capsys):
+    proxy = MetricsPublisherProxy()
+    proxy.add_hook_metrics_publisher(mock_session, HOOK_TYPE, ACCOUNT_ID)
+    assert isinstance(proxy._hook_publishers[0], EMFHookMetricsPublisher)
+
+    proxy.publish_hook_exception_metric(
+        datetime(2019, 1, 1),
+        HookInvocationPoint.CREATE_PRE_PROVISION,
+        Exception("fake-err"),
+    )
+    proxy.flush()
+
+    (document,) = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    metric_directive = document["_aws"]["CloudWatchMetrics"][0]
+    assert metric_directive["Namespace"] == "AWS/CloudFormation/123456789012/De/Ee/Ff"
+    assert metric_directive["Dimensions"] == [
+        [
+            "DimensionKeyInvocationPointType",
+            "DimensionKeyExceptionType",
+            "DimensionKeyHookType",
+        ]
+    ]
+    assert document["DimensionKeyInvocationPointType"] == "CREATE_PRE_PROVISION"
+    assert document["DimensionKeyExceptionType"] == "builtins.Exception"
+    assert document["DimensionKeyHookType"] == HOOK_TYPE
+    assert document[MetricTypes.HandlerException.name] == 1.0
+
+
 def test_metrics_publisher_proxy_add_metrics_publisher_none_safe():
     proxy = MetricsPublisherProxy()
     proxy.add_metrics_publisher(None, None)
     proxy.add_hook_metrics_publisher(None, None, None)
-    assert proxy._publishers == []  # pylint: disable=protected-access
+    # pylint: disable=protected-access
+    assert proxy._resource_publishers == ()
+    assert proxy._hook_publishers == ()
+    assert not proxy.has_publishers
+
+
+def test_metrics_publisher_proxy_publish_without_publishers():
+    proxy = MetricsPublisherProxy()
+    with patch.object(proxy, "_publish_invocation") as mock_invocation, patch.object(
+        proxy, "_publish_duration"
+    ) as mock_duration, patch.object(proxy, "_publish_exception") as mock_exception:
+        proxy.publish_invocation_metric(datetime(2019, 1, 1), Action.CREATE)
+        proxy.publish_duration_metric(datetime(2019, 1, 1), Action.CREATE, 100)
+        proxy.publish_exception_metric(datetime(2019, 1, 1), Action.CREATE, Exception())
+        proxy.publish_hook_invocation_metric(
+            datetime(2019, 1, 1), HookInvocationPoint.CREATE_PRE_PROVISION
+        )
+        proxy.publish_log_delivery_exception_metric(datetime(2019, 1, 1), Exception())
+    mock_invocation.assert_not_called()
+    mock_duration.assert_not_called()
+    mock_exception.assert_not_called()
+
+
+def test_metrics_publisher_proxy_routes_by_operation_type(mock_session):
+    proxy = MetricsPublisherProxy()
+    proxy.add_metrics_publisher(mock_session, RESOURCE_TYPE)
+    proxy.add_hook_metrics_publisher(mock_session, HOOK_TYPE, ACCOUNT_ID)
+    assert proxy.has_publishers
+
+    proxy.publish_hook_invocation_metric(
+        datetime(2019, 1, 1), HookInvocationPoint.CREATE_PRE_PROVISION
+    )
+    proxy.flush()
+
+    mock_session.client.return_value.put_metric_data.assert_called_once()
+    call_kwargs = mock_session.client.return_value.put_metric_data.call_args[1]
+    assert call_kwargs["Namespace"] == "AWS/CloudFormation/123456789012/De/Ee/Ff"
@@ -130,6 +130,7 @@ def test_entrypoint_handler_raises():
         )
 
     mock_metrics.return_value.publish_exception_metric.assert_called_once()
+    mock_metrics.return_value.flush.assert_called_once()
     assert event == {
         "errorCode": "InvalidRequest",
         "message": "handler failed",